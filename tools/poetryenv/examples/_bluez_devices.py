@@ -0,0 +1,125 @@
+"""Shared BlueZ Device1 tracking for the example scanners.
+
+`DeviceTracker` keeps a copy of every device's Device1 properties current
+from BlueZ signals and hands the merged dict to an `on_update` callback
+whenever it changes. Used by scan_ble.py and live_pcap.py.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from dbus_next import Message, MessageType
+from dbus_next.aio import MessageBus
+
+
+def _apply_delta(props: Dict[str, Any], changed: Dict[str, Any], invalidated: Sequence[str]) -> None:
+    props.update(changed)
+    # Properties BlueZ no longer has a value for (e.g. RSSI once
+    # discovery stops) are listed as invalidated
+    for name in invalidated:
+        props.pop(name, None)
+
+
+def _add_match(rule: str) -> Message:
+    return Message(
+        destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+        interface='org.freedesktop.DBus', member='AddMatch', signature='s',
+        body=[rule])
+
+
+class DeviceTracker:
+    """Track Device1 properties from InterfacesAdded/Removed and
+    PropertiesChanged signals, calling `on_update(props)` on each change.
+
+    Only devices under `adapter_path` are tracked.
+    """
+
+    def __init__(self, bus: MessageBus, adapter_path: str,
+                 on_update: Callable[[Dict[str, Any]], None]) -> None:
+        self.bus = bus
+        self.adapter_path = adapter_path
+        self._prefix = adapter_path + '/'
+        self.on_update = on_update
+        self.device_props: Dict[str, Dict[str, Any]] = {}
+        # Paths with a GetAll in flight, mapped to the PropertiesChanged
+        # deltas received meanwhile; they are replayed over the reply
+        self._pending: Dict[str, List[Tuple[Dict[str, Any], Sequence[str]]]] = {}
+
+    async def start(self) -> None:
+        # Subscribe before seeding so no update is lost in between
+        self.bus.add_message_handler(self._on_message)
+        await self.bus.call(_add_match(
+            "type='signal',sender='org.bluez',interface='org.freedesktop.DBus.ObjectManager'"))
+        await self.bus.call(_add_match(
+            "type='signal',sender='org.bluez',interface='org.freedesktop.DBus.Properties',"
+            "member='PropertiesChanged',arg0='org.bluez.Device1'"))
+
+        # Seed from the adapter's dev_* child nodes with Device1-only GetAll
+        # calls; GetManagedObjects would also marshal every GATT object.
+        # Introspect only now, after AddMatch, so a device added before
+        # this point is either listed here or delivered as a signal.
+        adapter_introspect = await self.bus.introspect('org.bluez', self.adapter_path)
+        paths = [f"{self._prefix}{n.name}" for n in adapter_introspect.nodes
+                 if n.name and n.name.startswith('dev_')]
+        for p in paths:
+            self._pending.setdefault(p, [])
+        await asyncio.gather(*(self._fetch_device(p) for p in paths))
+
+    def stop(self) -> None:
+        self.bus.remove_message_handler(self._on_message)
+
+    async def _fetch_device(self, path: str) -> None:
+        # Fetch only this device's Device1 properties rather than
+        # re-reading the whole BlueZ object tree
+        try:
+            reply = await self.bus.call(Message(
+                destination='org.bluez', path=path, interface='org.freedesktop.DBus.Properties',
+                member='GetAll', signature='s', body=['org.bluez.Device1']))
+        finally:
+            deltas = self._pending.pop(path, [])
+        if reply.message_type != MessageType.METHOD_RETURN or path in self.device_props:
+            return
+        # Signals handled while the reply was in flight are newer than it
+        props = dict(reply.body[0])
+        for changed, invalidated in deltas:
+            _apply_delta(props, changed, invalidated)
+        self.device_props[path] = props
+        self.on_update(props)
+
+    def _on_message(self, msg: Message) -> None:
+        if msg.message_type != MessageType.SIGNAL or not msg.body:
+            return
+        if msg.interface == 'org.freedesktop.DBus.ObjectManager':
+            path, ifaces = msg.body
+            if not path.startswith(self._prefix):
+                return
+            if msg.member == 'InterfacesAdded':
+                props = ifaces.get('org.bluez.Device1')
+                if props:
+                    self.device_props[path] = dict(props)
+                    self.on_update(self.device_props[path])
+            elif msg.member == 'InterfacesRemoved' and 'org.bluez.Device1' in ifaces:
+                self.device_props.pop(path, None)
+            return
+        # Device1 property deltas (RSSI, ManufacturerData, ...) arrive as
+        # PropertiesChanged on the device path; merge them into our copy.
+        if msg.member != 'PropertiesChanged' or msg.interface != 'org.freedesktop.DBus.Properties':
+            return
+        if msg.body[0] != 'org.bluez.Device1' or not msg.path.startswith(self._prefix):
+            return
+        changed = msg.body[1]
+        invalidated = msg.body[2] if len(msg.body) > 2 else ()
+        props = self.device_props.get(msg.path)
+        if props is None:
+            # Update for a device we have no snapshot of yet (e.g. it raced
+            # the initial seeding); hold it until the GetAll reply is in
+            pending = self._pending.get(msg.path)
+            if pending is None:
+                self._pending[msg.path] = [(changed, invalidated)]
+                asyncio.ensure_future(self._fetch_device(msg.path))
+            else:
+                pending.append((changed, invalidated))
+            return
+        _apply_delta(props, changed, invalidated)
+        self.on_update(props)
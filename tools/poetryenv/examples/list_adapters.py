@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 """List Bluetooth HCI adapters on the host.
 
-This utility prefers reading `/sys/class/bluetooth` and falls back to
-`hciconfig` output. Prints a table of interfaces, addresses and state.
+Queries BlueZ over D-Bus and prints a table of interfaces, addresses and
+state. Pass `--verbose` to include every Adapter1 property. When stdout is
+not a terminal, rows are printed tab-separated instead of as a Rich table.
 """
+import argparse
 import sys
-from rich.table import Table
-from rich.console import Console
 
 
 def main():
+    ap = argparse.ArgumentParser(prog='list-adapters')
+    ap.add_argument('--verbose', '-v', action='store_true', help='Show all Adapter1 properties')
+    args = ap.parse_args()
+
     # Use dbus-next asyncio API to connect to system bus and query BlueZ
     import asyncio
     from dbus_next.aio import MessageBus
@@ -41,19 +45,34 @@ def main():
                 powered = bool(_unwrap(props.get('Powered', False)))
                 adapters.append({'iface': iface, 'address': address, 'powered': powered, 'props': props})
 
+        rows = []
+        for a in adapters:
+            iface = a['iface']
+            address = a.get('address', '')
+            state = 'up' if a.get('powered') else 'down'
+            props = a.get('props', {})
+            if args.verbose:
+                details = ', '.join(f"{k}={_unwrap(v)}" for k, v in props.items())
+            else:
+                details = f"{len(props)} properties"
+            rows.append((iface, address, state, details))
+
+        if not sys.stdout.isatty():
+            for r in rows:
+                print('\t'.join(r))
+            return 0
+
+        from rich.console import Console
+        from rich.table import Table
+
         console = Console()
         table = Table(show_header=True, header_style="bold magenta")
         table.add_column("Interface", style="dim", width=8)
         table.add_column("Address", width=20)
         table.add_column("State", width=12)
         table.add_column("Details", overflow="fold")
-
-        for a in adapters:
-            iface = a['iface']
-            address = a.get('address', '')
-            state = 'up' if a.get('powered') else 'down'
-            details = ', '.join(f"{k}={_unwrap(v)}" for k, v in a.get('props', {}).items())
-            table.add_row(iface, address, state, details)
+        for r in rows:
+            table.add_row(*r)
 
         console.print(table)
         return 0
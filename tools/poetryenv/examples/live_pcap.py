@@ -1,24 +1,32 @@
 #!/usr/bin/env python3
-"""Scapy-only DBus BLE live streamer (layer.summary output).
+"""DBus BLE live streamer (Scapy-style layer summary output).
 
-Prints concatenated Scapy layer summary strings for each discovered device:
-  <layer1_summary> / <layer2_summary> / ...
+Prints one HCI_LE_Meta_Advertising_Report summary line per device update:
+  HCI_LE_Meta_Advertising_Report / addr=... / rssi=... / len=... / data=0x...
 
-This file uses direct imports (no try/except) so missing Scapy layers
-will raise ImportError as requested.
+`data` is the device's ManufacturerData/ServiceData encoded as advertising
+data (AD) structures. With `--dissect` each structure is appended as its
+own layer: ... / AD(type=0xff, data=0x...) / ...
+
+The line is formatted directly from the BlueZ Device1 properties; no
+Scapy packets are built, so Scapy is not imported.
+
+Updates are driven by BlueZ signals. `--poll` (and the `poll` argument of
+`stream_summaries`) is still accepted for compatibility but is ignored.
 """
 from __future__ import annotations
 
 import argparse
 import asyncio
 import sys
-from typing import Any, Dict, Optional
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
 from dbus_next.aio import MessageBus
 from dbus_next.constants import BusType
 
-from scapy.layers.bluetooth import HCI_LE_Meta_Advertising_Report  # type: ignore
-from scapy.packet import NoPayload  # type: ignore
+from _bluez_devices import DeviceTracker
 
 
 def _unwrap_variant(v: Any) -> Any:
@@ -28,11 +36,78 @@ def _unwrap_variant(v: Any) -> Any:
         return v
 
 
-async def stream_summaries(iface: str, poll: float = 0.5, duration: Optional[float] = None) -> int:
+@dataclass
+class DeviceRecord:
+    """Last reported state of a device, updated in place on change.
+
+    `canon` is the `_canonicalize` form of the last printed state. `raw`
+    holds the still-wrapped property values it was decoded from; merged
+    PropertiesChanged updates keep untouched values as the same objects,
+    so an identity match means nothing needs decoding.
+    """
+    __slots__ = ('canon', 'raw')
+    canon: bytes
+    raw: tuple
+
+
+_BASE_UUID_SUFFIX = '-0000-1000-8000-00805f9b34fb'
+
+
+def _ad_struct(buf: bytearray, head: bytes, payload: Any) -> None:
+    payload = bytes(_unwrap_variant(payload))[:254 - len(head)]
+    buf.append(len(head) + len(payload))
+    buf += head
+    buf += payload
+
+
+def _manufacturer_ad(manuf: Any) -> bytes:
+    """Encode a ManufacturerData dict as 0xFF AD structures."""
+    buf = bytearray()
+    for cid, v in (manuf or {}).items():
+        _ad_struct(buf, b'\xff' + int(cid).to_bytes(2, 'little'), v)
+    return bytes(buf)
+
+
+def _service_ad(svc: Any) -> bytes:
+    """Encode a ServiceData dict as 0x16 (16-bit UUID) or 0x21 AD structures."""
+    buf = bytearray()
+    for u, v in (svc or {}).items():
+        u = str(u).lower()
+        if u.startswith('0000') and u.endswith(_BASE_UUID_SUFFIX):
+            head = b'\x16' + int(u[4:8], 16).to_bytes(2, 'little')
+        else:
+            head = b'\x21' + uuid.UUID(u).bytes[::-1]
+        _ad_struct(buf, head, v)
+    return bytes(buf)
+
+
+def parse_ad(data: bytes) -> List[Tuple[int, bytes]]:
+    """Split advertising data into (ad_type, payload) tuples.
+
+    Stops at a zero length byte or a structure running past the buffer.
+    """
+    out = []
+    i = 0
+    n = len(data)
+    while i < n:
+        length = data[i]
+        if length == 0 or i + length >= n:
+            break
+        out.append((data[i + 1], data[i + 2:i + 1 + length]))
+        i += 1 + length
+    return out
+
+
+def _canonicalize(name: str, rssi: Optional[int], manuf: bytes, svc: bytes) -> bytes:
+    """Pack the fields that drive output into one comparable byte string."""
+    name_b = name.encode('utf-8', 'replace')
+    return b'%d|%d|%d|%d|' % (rssi is None, rssi or 0, len(name_b), len(manuf)) + name_b + manuf + svc
+
+
+async def stream_summaries(iface: str, poll: Optional[float] = None, duration: Optional[float] = None,
+                           dissect: bool = False) -> int:
+    # `poll` is deprecated and unused: output follows BlueZ signals
     bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    root_introspect = await bus.introspect('org.bluez', '/')
-    root = bus.get_proxy_object('org.bluez', '/', root_introspect)
-    manager = root.get_interface('org.freedesktop.DBus.ObjectManager')
 
     adapter_path = f"/org/bluez/{iface}"
     try:
@@ -43,82 +118,69 @@ async def stream_summaries(iface: str, poll: float = 0.5, duration: Optional[flo
         print("Adapter error:", exc, file=sys.stderr)
         return 2
 
+    seen: Dict[str, DeviceRecord] = {}
+
+    def _emit(props: Dict[str, Any]) -> None:
+        addr = _unwrap_variant(props.get('Address') or props.get('address') or '')
+        if not addr:
+            return
+
+        raw = (
+            props.get('Name') or props.get('Alias'),
+            props.get('RSSI') or props.get('rssi'),
+            props.get('ManufacturerData') or props.get('manufacturer_data'),
+            props.get('ServiceData') or props.get('service_data'),
+        )
+        prev = seen.get(addr)
+        if prev is not None and all(a is b for a, b in zip(prev.raw, raw)):
+            return
+
+        name = _unwrap_variant(raw[0] or '') or ''
+        rssi_v = _unwrap_variant(raw[1] or None)
+        try:
+            rssi = int(rssi_v) if rssi_v is not None and rssi_v != '' else None
+        except Exception:
+            rssi = None
+
+        manuf = _manufacturer_ad(_unwrap_variant(raw[2]))
+        svc = _service_ad(_unwrap_variant(raw[3]))
+        canon = _canonicalize(name, rssi, manuf, svc)
+
+        if prev is not None:
+            prev.raw = raw
+            if prev.canon == canon:
+                return
+
+        # Summarise as an HCI_LE_Meta_Advertising_Report; every field is
+        # already known from the D-Bus properties, so no packet is built
+        data_bytes = manuf + svc
+        line = (f"HCI_LE_Meta_Advertising_Report / addr={addr} / rssi={rssi or 0}"
+                f" / len={len(data_bytes)} / data=0x{data_bytes.hex()}")
+        if dissect:
+            line += ''.join(f" / AD(type=0x{t:02x}, data=0x{v.hex()})" for t, v in parse_ad(data_bytes))
+        print(line)
+        sys.stdout.flush()
+
+        if prev is None:
+            seen[addr] = DeviceRecord(canon, raw)
+        else:
+            prev.canon = canon
+
+    tracker = DeviceTracker(bus, adapter_path, _emit)
+    await tracker.start()
+
     try:
         await adapter.call_start_discovery()
     except Exception:
         pass
 
-    seen: Dict[str, Dict[str, Any]] = {}
-    start_ts = asyncio.get_event_loop().time()
-
     try:
-        while True:
-            if duration is not None and asyncio.get_event_loop().time() - start_ts >= duration:
-                break
-
-            managed = await manager.call_get_managed_objects()
-            for path, ifaces in managed.items():
-                props = ifaces.get('org.bluez.Device1')
-                if not props:
-                    continue
-
-                addr = _unwrap_variant(props.get('Address') or props.get('address') or '')
-                if not addr:
-                    continue
-
-                name = _unwrap_variant(props.get('Name') or props.get('Alias') or '') or ''
-                rssi_v = _unwrap_variant(props.get('RSSI') or props.get('rssi') or None)
-                try:
-                    rssi = int(rssi_v) if rssi_v is not None and rssi_v != '' else None
-                except Exception:
-                    rssi = None
-
-                manuf = _unwrap_variant(props.get('ManufacturerData') or props.get('manufacturer_data') or {})
-                svc = _unwrap_variant(props.get('ServiceData') or props.get('service_data') or {})
-
-                prev = seen.get(addr)
-                changed = prev is None or prev.get('name') != name or prev.get('rssi') != rssi or prev.get('manuf') != manuf or prev.get('svc') != svc
-                if not changed:
-                    continue
-
-                # Build an HCI_LE_Meta_Advertising_Report with combined raw data bytes
-                def _to_bytes(x: Any) -> bytes:
-                    try:
-                        if isinstance(x, dict):
-                            parts = []
-                            for _, v in x.items():
-                                try:
-                                    parts.append(bytes(v))
-                                except Exception:
-                                    parts.append(str(v).encode('utf-8'))
-                            return b"".join(parts)
-                        return bytes(x)
-                    except Exception:
-                        return str(x).encode('utf-8')
-
-                data_bytes = _to_bytes(manuf) + _to_bytes(svc)
-                pkt = HCI_LE_Meta_Advertising_Report(addr=addr, len=len(data_bytes), data=data_bytes, rssi=(rssi or 0))
-
-                # Build a richer string: layer summaries plus key fields
-                # For HCI_LE_Meta_Advertising_Report include addr, rssi, len and hex(data)
-                try:
-                    data_hex = data_bytes.hex() if data_bytes else ""
-                except Exception:
-                    data_hex = str(data_bytes)
-                line_parts = [
-                    pkt.__class__.__name__,
-                    "addr=" + str(pkt.addr),
-                    "rssi=" + str(getattr(pkt, 'rssi', '')),
-                    "len=" + str(getattr(pkt, 'len', '')),
-                    "data=0x" + data_hex,
-                ]
-                print(' / '.join(line_parts))
-                sys.stdout.flush()
-
-                seen[addr] = {'name': name, 'rssi': rssi, 'manuf': manuf, 'svc': svc}
-
-            await asyncio.sleep(poll)
+        if duration is None:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.sleep(duration)
     finally:
+        tracker.stop()
         try:
             await adapter.call_stop_discovery()
         except Exception:
@@ -130,11 +192,13 @@ async def stream_summaries(iface: str, poll: float = 0.5, duration: Optional[flo
 def main() -> int:
     ap = argparse.ArgumentParser(prog='live-pcap-summary')
     ap.add_argument('--iface', '-i', default='hci0')
-    ap.add_argument('--poll', type=float, default=0.5)
+    ap.add_argument('--poll', type=float, default=None,
+                    help='Deprecated and ignored; updates are signal-driven')
     ap.add_argument('--duration', type=float, default=None)
+    ap.add_argument('--dissect', action='store_true', help='Append each AD structure as its own layer')
     args = ap.parse_args()
 
-    return asyncio.run(stream_summaries(args.iface, poll=args.poll, duration=args.duration))
+    return asyncio.run(stream_summaries(args.iface, poll=args.poll, duration=args.duration, dissect=args.dissect))
 
 
 if __name__ == '__main__':
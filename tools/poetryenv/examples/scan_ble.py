@@ -9,16 +9,35 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import bisect
 import datetime
-import io
 import sys
-from typing import Dict, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
 
 from rich.console import Console
 from rich.table import Table
 
 
-def build_table(devices: Dict[str, Dict], max_rows: Optional[int] = None) -> Table:
+def _unwrap(v):
+    return getattr(v, 'value', v)
+
+
+# Upper bound for the reprint backoff of an unbounded scan
+MAX_INTERVAL = 30.0
+
+
+@dataclass
+class DeviceRecord:
+    """Row shown for a device; RSSI is '' when BlueZ has not reported one."""
+    __slots__ = ('name', 'rssi', 'last_seen')
+    name: str
+    rssi: Union[int, str]
+    last_seen: str
+
+
+def build_table(devices: Dict[str, DeviceRecord], max_rows: Optional[int] = None,
+                order: Optional[List[str]] = None) -> Table:
     t = Table(show_header=True, header_style="bold cyan")
     t.add_column("Address", style="dim", width=17)
     t.add_column("Name", overflow="fold")
@@ -26,10 +45,11 @@ def build_table(devices: Dict[str, Dict], max_rows: Optional[int] = None) -> Tab
     t.add_column("Last Seen", justify="right", width=10)
 
     rows = 0
-    for addr, info in sorted(devices.items()):
+    for addr in (order if order is not None else sorted(devices)):
         if max_rows is not None and rows >= max_rows:
             break
-        t.add_row(addr, info.get('name', ''), str(info.get('rssi', '')), info.get('last_seen', ''))
+        info = devices[addr]
+        t.add_row(addr, info.name, str(info.rssi), info.last_seen)
         rows += 1
     return t
 
@@ -38,65 +58,99 @@ async def scan_loop(iface: str, interval: float = 1.0, duration: Optional[float]
     from dbus_next.aio import MessageBus
     from dbus_next.constants import BusType
 
+    from _bluez_devices import DeviceTracker
+
     bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    root_introspect = await bus.introspect('org.bluez', '/')
-    root_obj = bus.get_proxy_object('org.bluez', '/', root_introspect)
-    manager = root_obj.get_interface('org.freedesktop.DBus.ObjectManager')
 
     adapter_path = f"/org/bluez/{iface}"
     adapter_introspect = await bus.introspect('org.bluez', adapter_path)
     adapter_obj = bus.get_proxy_object('org.bluez', adapter_path, adapter_introspect)
     adapter = adapter_obj.get_interface('org.bluez.Adapter1')
 
-    devices: Dict[str, Dict] = {}
+    devices: Dict[str, DeviceRecord] = {}
     console = Console(file=sys.stdout)
+    # Plain-text (no ANSI) console reused for every table print
+    plain_console = Console(file=sys.stdout, force_terminal=False, color_system=None)
+    changed = asyncio.Event()
+    added = asyncio.Event()
+    # Sorted addresses, kept in order by inserting each new device once
+    order: List[str] = []
+
+    def _update(props: Dict) -> None:
+        addr = _unwrap(props.get('Address') or props.get('address') or '')
+        if not addr:
+            return
+        name = _unwrap(props.get('Name') or props.get('Alias') or '')
+        rssi_raw = _unwrap(props.get('RSSI') or props.get('rssi') or None)
+        try:
+            rssi_val = int(rssi_raw) if rssi_raw is not None and rssi_raw != '' else ''
+        except Exception:
+            rssi_val = ''
+
+        name = str(name) if name else ''
+        last_seen = datetime.datetime.now().strftime('%H:%M:%S')
+        rec = devices.get(str(addr))
+        if rec is None:
+            devices[str(addr)] = DeviceRecord(name, rssi_val, last_seen)
+            bisect.insort(order, str(addr))
+            added.set()
+        else:
+            rec.name, rec.rssi, rec.last_seen = name, rssi_val, last_seen
+        changed.set()
+
+    tracker = DeviceTracker(bus, adapter_path, _update)
+    await tracker.start()
 
     try:
         await adapter.call_start_discovery()
     except Exception as e:
         console.print(f"[yellow]Warning: start_discovery failed: {e}[/]")
 
-    start = asyncio.get_event_loop().time()
+    # Print the first table straight away, even with no devices in range
+    changed.set()
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + duration if duration is not None else None
+    stable = 0
+    last_total = -1
     try:
         while True:
-            if duration is not None and asyncio.get_event_loop().time() - start >= duration:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
                 break
-
-            objs = await manager.call_get_managed_objects()
-            for path, ifaces in objs.items():
-                if 'org.bluez.Device1' not in ifaces:
-                    continue
-                props = ifaces['org.bluez.Device1']
-                addr = getattr(props.get('Address') or props.get('address') or '', 'value', props.get('Address') or props.get('address') or '')
-                if not addr:
-                    continue
-                name = getattr(props.get('Name') or props.get('Alias') or '', 'value', props.get('Name') or props.get('Alias') or '')
-                rssi_raw = getattr(props.get('RSSI') or props.get('rssi') or None, 'value', props.get('RSSI') or props.get('rssi') or None)
-                try:
-                    rssi_val = int(rssi_raw) if rssi_raw is not None and rssi_raw != '' else ''
-                except Exception:
-                    rssi_val = ''
-
-                devices[str(addr)] = {
-                    'name': str(name) if name else '',
-                    'rssi': rssi_val,
-                    'last_seen': datetime.datetime.now().strftime('%H:%M:%S'),
-                }
+            changed.clear()
+            added.clear()
 
             total = len(devices)
-            with_rssi = sum(1 for v in devices.values() if v.get('rssi') != '')
-            # Render table to a plain-text buffer (no ANSI) then write to stdout
-            buf = io.StringIO()
-            plain_console = Console(file=buf, force_terminal=False, color_system=None)
+            with_rssi = sum(1 for v in devices.values() if v.rssi != '')
             plain_console.print(f"Discovered: {total}   With RSSI: {with_rssi}")
-            plain_console.print(build_table(devices))
-            sys.stdout.write(buf.getvalue())
+            plain_console.print(build_table(devices, order=order))
             sys.stdout.flush()
 
+            # Coalesce further updates: re-render at most once per interval
             await asyncio.sleep(interval)
+
+            if deadline is None:
+                # Unbounded scan: while no new device shows up, double the
+                # wait after each print (capped at MAX_INTERVAL); a new
+                # device ends the backoff early
+                stable = stable + 1 if total == last_total else 0
+                last_total = total
+                backoff = min(MAX_INTERVAL, interval * (1 << min(stable, 5))) - interval
+                if backoff > 0 and not added.is_set():
+                    try:
+                        await asyncio.wait_for(added.wait(), backoff)
+                    except asyncio.TimeoutError:
+                        pass
     except KeyboardInterrupt:
         pass
     finally:
+        tracker.stop()
         try:
             await adapter.call_stop_discovery()
         except Exception:
@@ -108,7 +162,7 @@ async def scan_loop(iface: str, interval: float = 1.0, duration: Optional[float]
 def main() -> int:
     ap = argparse.ArgumentParser(prog='scan-ble')
     ap.add_argument('--iface', default='hci0')
-    ap.add_argument('--interval', type=float, default=1.0, help='Seconds between table prints')
+    ap.add_argument('--interval', type=float, default=1.0, help='Minimum seconds between table prints')
     ap.add_argument('--duration', type=float, default=None, help='Optional total scan duration in seconds')
     args = ap.parse_args()
 
@@ -15,7 +15,8 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 
 from IPython import embed
 from dbus_next.aio import MessageBus
@@ -31,20 +32,64 @@ def _unwrap(v: Any):
         return v
 
 
+# The synchronous shell helpers dispatch their coroutines onto a single
+# long-lived event loop running on a daemon thread, so the bus connection
+# and caches below survive between calls.
+_LOOP = asyncio.new_event_loop()
+threading.Thread(target=_LOOP.run_forever, name='gatt-cli-loop', daemon=True).start()
+
+
+def _call(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _LOOP).result()
+
+
+# One system bus connection shared by all helpers, plus caches of the
+# introspection data and proxy interfaces built on top of it. They are
+# tied to the event loop that created the connection and are rebuilt if
+# a helper runs on a different loop.
+_BUS: Optional[MessageBus] = None
+_BUS_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_INTROSPECT: Dict[str, Any] = {}
+_IFACES: Dict[Tuple[str, str], Any] = {}
+
+
+async def _get_bus() -> MessageBus:
+    global _BUS, _BUS_LOOP
+    loop = asyncio.get_running_loop()
+    if _BUS is None or _BUS_LOOP is not loop or not _BUS.connected:
+        _INTROSPECT.clear()
+        _IFACES.clear()
+        _BUS = await MessageBus(bus_type=BusType.SYSTEM).connect()
+        _BUS_LOOP = loop
+    return _BUS
+
+
+async def _introspect(path: str):
+    xml = _INTROSPECT.get(path)
+    if xml is None:
+        xml = await (await _get_bus()).introspect('org.bluez', path)
+        _INTROSPECT[path] = xml
+    return xml
+
+
+async def _get_interface(path: str, iface: str):
+    bus = await _get_bus()
+    key = (path, iface)
+    proxy = _IFACES.get(key)
+    if proxy is None:
+        obj = bus.get_proxy_object('org.bluez', path, await _introspect(path))
+        proxy = obj.get_interface(iface)
+        _IFACES[key] = proxy
+    return proxy
+
+
 async def _get_managed_objects():
-    bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    introspect = await bus.introspect('org.bluez', '/')
-    root = bus.get_proxy_object('org.bluez', '/', introspect)
-    manager = root.get_interface('org.freedesktop.DBus.ObjectManager')
+    manager = await _get_interface('/', 'org.freedesktop.DBus.ObjectManager')
     return await manager.call_get_managed_objects()
 
 
 async def _start_discovery(iface: str = 'hci0') -> None:
-    bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    adapter_path = f"/org/bluez/{iface}"
-    introspect = await bus.introspect('org.bluez', adapter_path)
-    adapter_obj = bus.get_proxy_object('org.bluez', adapter_path, introspect)
-    adapter = adapter_obj.get_interface('org.bluez.Adapter1')
+    adapter = await _get_interface(f"/org/bluez/{iface}", 'org.bluez.Adapter1')
     try:
         await adapter.call_start_discovery()
     except Exception:
@@ -52,38 +97,62 @@ async def _start_discovery(iface: str = 'hci0') -> None:
 
 
 async def _stop_discovery(iface: str = 'hci0') -> None:
-    bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    adapter_path = f"/org/bluez/{iface}"
-    introspect = await bus.introspect('org.bluez', adapter_path)
-    adapter_obj = bus.get_proxy_object('org.bluez', adapter_path, introspect)
-    adapter = adapter_obj.get_interface('org.bluez.Adapter1')
+    adapter = await _get_interface(f"/org/bluez/{iface}", 'org.bluez.Adapter1')
     try:
         await adapter.call_stop_discovery()
     except Exception:
         pass
 
 
-async def _device_path_for_address(address: str) -> str | None:
-    objs = await _get_managed_objects()
+_ADDR_SEPARATORS = str.maketrans('-_', '::')
+
+
+def _canon_addr(address: str) -> str:
+    """Upper-case an address and normalise '-'/'_' separators to ':'."""
+    return address.translate(_ADDR_SEPARATORS).upper()
+
+
+def _address_index(objs: Dict[str, Any]) -> Dict[str, str]:
+    """Map upper-cased device address -> object path for one snapshot."""
+    index = {}
     for path, ifaces in objs.items():
         dev = ifaces.get('org.bluez.Device1')
         if not dev:
             continue
         addr = _unwrap(dev.get('Address') or dev.get('address') or '')
-        if addr and addr.upper() == address.upper():
-            return path
-    return None
+        if addr:
+            index[addr.upper()] = path
+    return index
 
 
-async def _connect(address: str) -> bool:
-    path = await _device_path_for_address(address)
+def _tree_index(objs: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Map device path -> characteristic paths beneath it, in one pass."""
+    index: Dict[str, List[str]] = {}
+    for path, ifaces in objs.items():
+        if 'org.bluez.GattCharacteristic1' in ifaces:
+            # /org/bluez/hciX/dev_XX_XX_XX_XX_XX_XX/serviceNNNN/charNNNN
+            index.setdefault('/'.join(path.split('/', 5)[:5]), []).append(path)
+    return index
+
+
+async def _snapshot() -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Fetch managed objects once and return them with their address index."""
+    objs = await _get_managed_objects()
+    return objs, _address_index(objs)
+
+
+async def _device_path_for_address(address: str, index: Optional[Dict[str, str]] = None) -> str | None:
+    if index is None:
+        _, index = await _snapshot()
+    return index.get(_canon_addr(address))
+
+
+async def _connect(address: str, index: Optional[Dict[str, str]] = None) -> bool:
+    path = await _device_path_for_address(address, index)
     if not path:
         print('Device not found')
         return None
-    bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    introspect = await bus.introspect('org.bluez', path)
-    obj = bus.get_proxy_object('org.bluez', path, introspect)
-    dev = obj.get_interface('org.bluez.Device1')
+    dev = await _get_interface(path, 'org.bluez.Device1')
     try:
         await dev.call_connect()
         return path
@@ -97,10 +166,7 @@ async def _disconnect(address: str) -> bool:
     if not path:
         print('Device not found')
         return False
-    bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    introspect = await bus.introspect('org.bluez', path)
-    obj = bus.get_proxy_object('org.bluez', path, introspect)
-    dev = obj.get_interface('org.bluez.Device1')
+    dev = await _get_interface(path, 'org.bluez.Device1')
     try:
         await dev.call_disconnect()
         print('Disconnected')
@@ -141,27 +207,38 @@ async def _list_devices_with_discovery(iface: str = 'hci0', timeout: float = 1.0
     return devices
 
 
-async def _list_chars_for(address: str) -> List[Dict[str, Any]]:
-    path = await _device_path_for_address(address)
+async def _list_chars_for(address: str, objs: Optional[Dict[str, Any]] = None,
+                          index: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    if objs is None:
+        objs, index = await _snapshot()
+    elif index is None:
+        # Reuse the caller's snapshot rather than fetching a second one
+        index = _address_index(objs)
+    path = await _device_path_for_address(address, index)
     if not path:
         return []
-    objs = await _get_managed_objects()
     chars = []
-    for p, ifaces in objs.items():
-        if not p.startswith(path):
-            continue
-        ch = ifaces.get('org.bluez.GattCharacteristic1')
-        if not ch:
-            continue
+    for p in _tree_index(objs).get(path, []):
+        ch = objs[p]['org.bluez.GattCharacteristic1']
         chars.append({'path': p, 'uuid': _unwrap(ch.get('UUID') or ch.get('uuid') or ''), 'flags': _unwrap(ch.get('Flags') or [])})
     return chars
 
 
+async def _list_chars_prefetched(address: str) -> List[Dict[str, Any]]:
+    """List characteristics and introspect all of them concurrently.
+
+    Subsequent `read()`/`write()` calls then find their proxy in the cache.
+    """
+    chars = await _list_chars_for(address)
+    await asyncio.gather(
+        *(_get_interface(c['path'], 'org.bluez.GattCharacteristic1') for c in chars),
+        return_exceptions=True,
+    )
+    return chars
+
+
 async def _read_char(char_path: str) -> bytes:
-    bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    introspect = await bus.introspect('org.bluez', char_path)
-    obj = bus.get_proxy_object('org.bluez', char_path, introspect)
-    ch = obj.get_interface('org.bluez.GattCharacteristic1')
+    ch = await _get_interface(char_path, 'org.bluez.GattCharacteristic1')
     val = await ch.call_read_value({})
     # val may be a list of ints or array of bytes
     try:
@@ -175,13 +252,9 @@ async def _read_char(char_path: str) -> bytes:
 
 
 async def _write_char(char_path: str, data: bytes) -> bool:
-    bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-    introspect = await bus.introspect('org.bluez', char_path)
-    obj = bus.get_proxy_object('org.bluez', char_path, introspect)
-    ch = obj.get_interface('org.bluez.GattCharacteristic1')
-    arr = list(data)
+    ch = await _get_interface(char_path, 'org.bluez.GattCharacteristic1')
     try:
-        await ch.call_write_value(arr, {})
+        await ch.call_write_value(bytes(data), {})
         return True
     except Exception as e:
         print('Write error:', e)
@@ -191,7 +264,7 @@ async def _write_char(char_path: str, data: bytes) -> bool:
 # Synchronous wrappers for the IPython shell
 def list_devices():
     # Print a Rich table for interactive use and do NOT return the list
-    devs = asyncio.run(_list_devices_with_discovery())
+    devs = _call(_list_devices_with_discovery())
     t = Table(title="Bluetooth Devices")
     t.add_column("Path", no_wrap=True)
     t.add_column("Address")
@@ -205,7 +278,7 @@ def list_devices():
 
 def get_devices():
     """Return device list for programmatic use (no printing)."""
-    return asyncio.run(_list_devices_with_discovery())
+    return _call(_list_devices_with_discovery())
 
 
 def connect(address: str):
@@ -216,7 +289,7 @@ def connect(address: str):
       svc.list_chars()
       svc.read('/org/bluez/...')
     """
-    path = asyncio.run(_connect(address))
+    path = _call(_connect(address))
     if not path:
         return None
     return DeviceSession(address, path)
@@ -233,7 +306,7 @@ class DeviceSession:
         self.path = path
 
     def list_chars(self):
-        return list_chars(self.address)
+        return _call(_list_chars_prefetched(self.address))
 
     def _find_char_path(self, uuid: str) -> str | None:
         chars = list_chars(self.address)
@@ -264,37 +337,41 @@ class DeviceSession:
 
 
 def start_discovery(iface: str = 'hci0'):
-    return asyncio.run(_start_discovery(iface))
+    return _call(_start_discovery(iface))
 
 
 def stop_discovery(iface: str = 'hci0'):
-    return asyncio.run(_stop_discovery(iface))
+    return _call(_stop_discovery(iface))
 
 
 def disconnect(address: str):
-    return asyncio.run(_disconnect(address))
+    return _call(_disconnect(address))
 
 
 def list_chars(address: str):
-    return asyncio.run(_list_chars_for(address))
+    return _call(_list_chars_for(address))
 
 
 def read(char_path: str) -> bytes:
-    return asyncio.run(_read_char(char_path))
+    return _call(_read_char(char_path))
 
 
 def write(char_path: str, data: bytes) -> bool:
-    return asyncio.run(_write_char(char_path, data))
+    return _call(_write_char(char_path, data))
 
 
 async def _read_char_by_address(address: str, uuid: str | None = None) -> bytes:
+    # One snapshot serves the device lookup, the characteristic list and
+    # the Connected check below
+    objs, index = await _snapshot()
+
     # Ensure device exists and find characteristic path
-    path = await _device_path_for_address(address)
+    path = await _device_path_for_address(address, index)
     if not path:
         raise RuntimeError('Device not found')
 
     # Find matching characteristic path
-    chars = await _list_chars_for(address)
+    chars = await _list_chars_for(address, objs, index)
     char_path = None
     if uuid:
         for c in chars:
@@ -309,12 +386,17 @@ async def _read_char_by_address(address: str, uuid: str | None = None) -> bytes:
         char_path = chars[0].get('path')
 
     # Connect if not connected
-    objs = await _get_managed_objects()
     dev_ifaces = objs.get(path, {})
     connected = bool(_unwrap(dev_ifaces.get('org.bluez.Device1', {}).get('Connected') if dev_ifaces else False))
     if not connected:
+        # Introspect the device and characteristic concurrently; the
+        # connect and read below then hit the proxy cache
+        await asyncio.gather(
+            _get_interface(path, 'org.bluez.Device1'),
+            _get_interface(char_path, 'org.bluez.GattCharacteristic1'),
+        )
         try:
-            await _connect(address)
+            await _connect(address, index)
         except Exception:
             # _connect prints error
             pass
@@ -328,7 +410,7 @@ def read_by_address(address: str, uuid: str | None = None) -> bytes:
     If `uuid` is omitted the first characteristic found will be read.
     This will attempt to connect the device if not already connected.
     """
-    return asyncio.run(_read_char_by_address(address, uuid))
+    return _call(_read_char_by_address(address, uuid))
 
 
 def read_auto(target: str, uuid: str | None = None) -> bytes:
@@ -350,7 +432,7 @@ _console = Console()
 
 def show_devices():
     """Pretty-print discovered devices as a Rich table."""
-    devs = asyncio.run(_list_devices_with_discovery())
+    devs = _call(_list_devices_with_discovery())
     t = Table(title="Bluetooth Devices")
     t.add_column("Path", no_wrap=True)
     t.add_column("Address")
@@ -363,7 +445,7 @@ def show_devices():
 
 def show_chars(address: str):
     """Pretty-print GATT characteristics for a device address as a Rich table."""
-    chs = list_chars(address)
+    chs = _call(_list_chars_prefetched(address))
     t = Table(title=f"GATT Chars for {address}")
     t.add_column("Path", no_wrap=True)
     t.add_column("UUID")
@@ -11,196 +11,278 @@ import sys
 import binascii
 import asyncio
 
+from dbus_next import Message, MessageType
+from dbus_next.aio import MessageBus
+from dbus_next.constants import BusType
 from rich.table import Table
 from rich.console import Console
 
 
+# BlueZ GattCharacteristic1.Flags tokens that grant each access type,
+# including the variants that only add a security requirement
+_READ_FLAGS = frozenset({'read', 'encrypt-read', 'encrypt-authenticated-read', 'secure-read'})
+_WRITE_FLAGS = frozenset({
+    'write', 'write-without-response', 'authenticated-signed-writes', 'reliable-write',
+    'encrypt-write', 'encrypt-authenticated-write', 'secure-write',
+})
+_NOTIFY_FLAGS = frozenset({'notify', 'encrypt-notify', 'encrypt-authenticated-notify', 'secure-notify'})
+_INDICATE_FLAGS = frozenset({'indicate', 'encrypt-indicate', 'encrypt-authenticated-indicate', 'secure-indicate'})
+
+
+# Control bytes that make a value print as hex. UTF-8 never uses bytes
+# below 0x20 inside multi-byte sequences, so checking bytes is the same as
+# checking decoded characters.
+_CONTROL_BYTES = bytes(range(32))
+
+
 def fmt_val(b: bytes) -> str:
     if not b:
         return ""
+    if len(b.translate(None, _CONTROL_BYTES)) != len(b):
+        return binascii.hexlify(b).decode('ascii')
+    if b.isascii():
+        # Typical flag values: plain ASCII needs no UTF-8 validation
+        return b.decode('ascii')
     try:
-        s = b.decode('utf-8')
-        if any(ord(c) < 32 for c in s):
-            raise ValueError
-        return s
-    except Exception:
+        return b.decode('utf-8')
+    except UnicodeDecodeError:
         return binascii.hexlify(b).decode('ascii')
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: gatt_enum.py <MAC>")
-        return 2
-    mac = sys.argv[1].upper()
+async def main_async(mac: str) -> int:
+    try:
+        bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
+    except Exception as e:
+        print(f"Failed to connect to system bus: {e}", file=sys.stderr)
+        return 4
 
-    from dbus_next.aio import MessageBus
-    from dbus_next.constants import BusType
-    from dbus_next import Variant
+    # Keep a local copy of the BlueZ object tree that InterfacesAdded /
+    # InterfacesRemoved signals patch in place, so it never has to be
+    # fetched again after the initial GetManagedObjects.
+    managed = {}
+    added = asyncio.Event()
 
-    async def main_async(mac: str) -> int:
-        try:
-            bus = await MessageBus(bus_type=BusType.SYSTEM).connect()
-        except Exception as e:
-            print(f"Failed to connect to system bus: {e}", file=sys.stderr)
-            return 4
+    def _on_message(msg):
+        if msg.message_type != MessageType.SIGNAL or msg.interface != 'org.freedesktop.DBus.ObjectManager':
+            return
+        if msg.member == 'InterfacesAdded':
+            path, ifaces = msg.body
+            managed.setdefault(path, {}).update(ifaces)
+            added.set()
+        elif msg.member == 'InterfacesRemoved':
+            path, names = msg.body
+            ifaces = managed.get(path)
+            if ifaces is not None:
+                for name in names:
+                    ifaces.pop(name, None)
+                if not ifaces:
+                    del managed[path]
 
-        # Use ObjectManager to find device matching MAC. Call method directly
-        # via a low-level Message to avoid ProxyInterface method name issues.
-        try:
-            root_introspect = await bus.introspect('org.bluez', '/')
-            from dbus_next import Message
-            msg = Message(destination='org.bluez', path='/', interface='org.freedesktop.DBus.ObjectManager', member='GetManagedObjects', signature='', body=[])
-            reply = await bus.call(msg)
-            managed = reply.body[0]
+    # Use ObjectManager to find device matching MAC. Call method directly
+    # via a low-level Message to avoid ProxyInterface method name issues.
+    try:
+        bus.add_message_handler(_on_message)
+        await bus.call(Message(
+            destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+            interface='org.freedesktop.DBus', member='AddMatch', signature='s',
+            body=["type='signal',sender='org.bluez',interface='org.freedesktop.DBus.ObjectManager'"]))
+        msg = Message(destination='org.bluez', path='/', interface='org.freedesktop.DBus.ObjectManager', member='GetManagedObjects', signature='', body=[])
+        reply = await bus.call(msg)
+        # The reply is newer than any signal that arrived before it
+        managed.update(reply.body[0])
+    except Exception as e:
+        print(f"Failed to get managed objects from BlueZ: {e}", file=sys.stderr)
+        return 4
 
-            pass
-        except Exception as e:
-            print(f"Failed to get managed objects from BlueZ: {e}", file=sys.stderr)
-            return 4
+    def _unwrap(v):
+        # a{sv} property values are always dbus-next Variants; the getattr
+        # default only covers the plain fallbacks passed in below
+        return getattr(v, 'value', v)
 
-        device_path = None
-        def _unwrap(v):
-            # Extract underlying value from dbus-next return types
-            try:
-                # common pattern: (signature, value) or Variant-like
-                if isinstance(v, (list, tuple)) and len(v) == 2 and not isinstance(v[0], dict):
-                    return v[1]
-            except Exception:
-                pass
-            # objects may have a `value` attribute
-            if hasattr(v, 'value'):
-                return v.value
-            return v
+    mac_underscore = mac.replace(':', '_').lower()
+    mac_nodelim = mac.replace(':', '').lower()
 
-        mac_underscore = mac.replace(':', '_').lower()
-        mac_nodelim = mac.replace(':', '').lower()
+    # BlueZ names device objects /org/bluez/hciX/dev_AA_BB_CC_DD_EE_FF
+    candidate = f"/org/bluez/hci0/dev_{mac.replace(':', '_')}"
 
+    def _find_device():
+        # Try the deterministic hci0 path first; scan the tree only on a miss
+        if 'org.bluez.Device1' in managed.get(candidate, ()):
+            return candidate
         for path, interfaces in managed.items():
             if 'org.bluez.Device1' in interfaces:
                 props = interfaces['org.bluez.Device1']
                 addr = props.get('Address') or props.get('address')
                 addr = _unwrap(addr) if addr is not None else None
                 if addr and str(addr).upper() == mac:
-                    device_path = path
-                    break
+                    return path
             # fallback: match device path containing MAC with underscores or hyphens
             lp = path.lower()
             if mac_underscore in lp or mac_nodelim in lp:
-                device_path = path
-                break
+                return path
+        return None
 
-        if not device_path:
-            # Try starting discovery programmatically and re-check managed objects
+    async def _wait_for(pred, timeout):
+        # Re-check `pred` each time new interfaces show up, until timeout
+        loop = asyncio.get_event_loop()
+        end = loop.time() + timeout
+        result = pred()
+        while not result:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            added.clear()
             try:
-                from dbus_next import Message
-                adapter_path = '/org/bluez/hci0'
-                start_msg = Message(destination='org.bluez', path=adapter_path, interface='org.bluez.Adapter1', member='StartDiscovery', signature='', body=[])
-                await bus.call(start_msg)
-                await asyncio.sleep(2)
-                msg2 = Message(destination='org.bluez', path='/', interface='org.freedesktop.DBus.ObjectManager', member='GetManagedObjects', signature='', body=[])
-                reply2 = await bus.call(msg2)
-                managed = reply2.body[0]
-
+                await asyncio.wait_for(added.wait(), remaining)
+            except asyncio.TimeoutError:
                 pass
+            result = pred()
+        return result
 
-                # retry device lookup
-                for path, interfaces in managed.items():
-                    if 'org.bluez.Device1' in interfaces:
-                        props = interfaces['org.bluez.Device1']
-                        addr = props.get('Address') or props.get('address')
-                        addr = _unwrap(addr) if addr is not None else None
-                        if addr and str(addr).upper() == mac:
-                            device_path = path
-                            break
-                    lp = path.lower()
-                    if mac_underscore in lp or mac_nodelim in lp:
-                        device_path = path
-                        break
-            except Exception as e:
-                print(f"StartDiscovery retry failed: {e}", file=sys.stderr)
-
-            if not device_path:
-                print(f"Device {mac} not found via BlueZ. Make sure it's visible to the adapter.", file=sys.stderr)
-                return 5
-
-        # Attempt to connect to the device to force service resolution
+    device_path = _find_device()
+
+    if not device_path:
+        # Try starting discovery programmatically and wait for the device
+        # to be announced. StartDiscovery is not awaited first: the device
+        # may already be on its way as an InterfacesAdded signal.
         try:
-            from dbus_next import Message
-            conn_msg = Message(destination='org.bluez', path=device_path, interface='org.bluez.Device1', member='Connect', signature='', body=[])
-            await bus.call(conn_msg)
-            await asyncio.sleep(1)
-            # refresh managed objects after connect
-            refresh_msg = Message(destination='org.bluez', path='/', interface='org.freedesktop.DBus.ObjectManager', member='GetManagedObjects', signature='', body=[])
-            reply3 = await bus.call(refresh_msg)
-            managed = reply3.body[0]
-            pass
+            adapter_path = '/org/bluez/hci0'
+            start_msg = Message(destination='org.bluez', path=adapter_path, interface='org.bluez.Adapter1', member='StartDiscovery', signature='', body=[])
+            discovery = asyncio.ensure_future(bus.call(start_msg))
+            discovery.add_done_callback(lambda t: t.cancelled() or t.exception())
+            found = asyncio.ensure_future(_wait_for(_find_device, 5))
+            await asyncio.wait([discovery, found], return_when=asyncio.FIRST_COMPLETED)
+            if not found.done():
+                # An error reply (e.g. NotReady with the adapter powered
+                # off) means the device will not show up; stop waiting
+                exc = discovery.exception()
+                start_reply = None if exc is not None else discovery.result()
+                if exc is not None or start_reply.message_type == MessageType.ERROR:
+                    found.cancel()
+                    print(f"StartDiscovery failed: {exc or start_reply.error_name}", file=sys.stderr)
+                    return 5
+            device_path = await found
         except Exception as e:
-            print(f"Connect attempt failed (continuing): {e}", file=sys.stderr)
+            print(f"StartDiscovery retry failed: {e}", file=sys.stderr)
 
-        rows = []
-        # find characteristics under device path
-        for path, interfaces in managed.items():
-            if not path.startswith(device_path):
-                continue
-            if 'org.bluez.GattCharacteristic1' in interfaces:
-                props = interfaces['org.bluez.GattCharacteristic1']
-                uuid = props.get('UUID', '')
-                uuid = _unwrap(uuid) if uuid is not None else ''
-                raw_flags = props.get('Flags', []) or []
-                uf = _unwrap(raw_flags) if raw_flags is not None else []
-                if isinstance(uf, (list, tuple)):
-                    flags_list = [str(x) for x in uf]
-                else:
-                    flags_list = [str(uf)] if uf else []
-                r_flag = 'Y' if any('read' in f.lower() for f in flags_list) else ''
-                w_flag = 'Y' if any('write' in f.lower() for f in flags_list) else ''
-                n_flag = 'Y' if any('notify' in f.lower() for f in flags_list) else ''
-                i_flag = 'Y' if any('indicate' in f.lower() for f in flags_list) else ''
-
-                # Attempt to call ReadValue via low-level Message call
-                value = ''
-                if r_flag:
-                    try:
-                        from dbus_next import Message
-                        read_msg = Message(destination='org.bluez', path=path, interface='org.bluez.GattCharacteristic1', member='ReadValue', signature='a{sv}', body=[{}])
-                        read_reply = await bus.call(read_msg)
-                        raw_val = read_reply.body[0]
-                        if isinstance(raw_val, (list, tuple)):
-                            raw = bytes(raw_val)
-                        elif isinstance(raw_val, (bytes, bytearray)):
-                            raw = bytes(raw_val)
-                        else:
-                            raw = b''
-                        value = fmt_val(raw)
-                    except Exception:
-                        value = ''
-
-                rows.append((path.rsplit('/', 1)[-1], uuid, r_flag, w_flag, n_flag, i_flag, value))
-
-        console = Console()
-        table = Table(show_header=True, header_style="bold cyan")
-        table.add_column("Handle", style="dim")
-        table.add_column("UUID")
-        table.add_column("R", justify="center")
-        table.add_column("W", justify="center")
-        table.add_column("N", justify="center")
-        table.add_column("I", justify="center")
-        table.add_column("Value", overflow="fold")
-
-        for r in rows:
-            table.add_row(*[str(x) for x in r])
-
-        console.print(table)
-        return 0
-
-    # run async main
-    exit_code = asyncio.run(main_async(mac))
-    return exit_code
+        if not device_path:
+            print(f"Device {mac} not found via BlueZ. Make sure it's visible to the adapter.", file=sys.stderr)
+            return 5
 
+    # Attempt to connect to the device to force service resolution. BlueZ
+    # flips Device1.ServicesResolved to True once GATT discovery is done,
+    # so wait for that rather than a fixed delay.
+    resolved = asyncio.Event()
+    dev_props = managed.get(device_path, {}).get('org.bluez.Device1', {})
+    if _unwrap(dev_props.get('ServicesResolved')) is True:
+        resolved.set()
 
-if __name__ == '__main__':
+    def _on_resolved(msg):
+        if msg.message_type != MessageType.SIGNAL or msg.path != device_path:
+            return
+        if msg.member != 'PropertiesChanged' or not msg.body or msg.body[0] != 'org.bluez.Device1':
+            return
+        if _unwrap(msg.body[1].get('ServicesResolved')) is True:
+            resolved.set()
+
+    bus.add_message_handler(_on_resolved)
+    try:
+        await bus.call(Message(
+            destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+            interface='org.freedesktop.DBus', member='AddMatch', signature='s',
+            body=["type='signal',sender='org.bluez',interface='org.freedesktop.DBus.Properties',"
+                  f"member='PropertiesChanged',path='{device_path}',arg0='org.bluez.Device1'"]))
+        conn_msg = Message(destination='org.bluez', path=device_path, interface='org.bluez.Device1', member='Connect', signature='', body=[])
+        reply = await bus.call(conn_msg)
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(reply.error_name)
+        # Services show up in `managed` via InterfacesAdded ahead of the
+        # ServicesResolved change, so no refetch is needed afterwards
+        await asyncio.wait_for(resolved.wait(), timeout=10)
+    except asyncio.TimeoutError:
+        print("Timed out waiting for services to resolve (continuing)", file=sys.stderr)
+    except Exception as e:
+        print(f"Connect attempt failed (continuing): {e}", file=sys.stderr)
+    finally:
+        bus.remove_message_handler(_on_resolved)
+
+    # Bucket characteristics by owning device in one pass:
+    # /org/bluez/hciX/dev_XX_XX_XX_XX_XX_XX/serviceNNNN/charNNNN
+    chars_by_device = {}
+    for path, interfaces in managed.items():
+        if 'org.bluez.GattCharacteristic1' in interfaces:
+            dev = '/'.join(path.split('/', 5)[:5])
+            chars_by_device.setdefault(dev, []).append((path, interfaces))
+
+    # Pass 1: collect characteristic metadata under the device path
+    chars = []
+    device_key = '/'.join(device_path.split('/', 5)[:5])
+    for path, interfaces in chars_by_device.get(device_key, []):
+        props = interfaces['org.bluez.GattCharacteristic1']
+        uuid = props.get('UUID', '')
+        uuid = _unwrap(uuid) if uuid is not None else ''
+        raw_flags = props.get('Flags', []) or []
+        uf = _unwrap(raw_flags) if raw_flags is not None else []
+        if isinstance(uf, (list, tuple)):
+            flags_list = [str(x) for x in uf]
+        else:
+            flags_list = [str(uf)] if uf else []
+        flagset = frozenset(f.lower() for f in flags_list)
+        r_flag = '' if flagset.isdisjoint(_READ_FLAGS) else 'Y'
+        w_flag = '' if flagset.isdisjoint(_WRITE_FLAGS) else 'Y'
+        n_flag = '' if flagset.isdisjoint(_NOTIFY_FLAGS) else 'Y'
+        i_flag = '' if flagset.isdisjoint(_INDICATE_FLAGS) else 'Y'
+        chars.append((path, uuid, r_flag, w_flag, n_flag, i_flag))
+
+    # Pass 2: issue all ReadValue calls concurrently; a few in flight at
+    # a time so BlueZ is not flooded with requests
+    sem = asyncio.Semaphore(8)
+
+    async def _read(path: str) -> str:
+        read_msg = Message(destination='org.bluez', path=path, interface='org.bluez.GattCharacteristic1', member='ReadValue', signature='a{sv}', body=[{}])
+        async with sem:
+            read_reply = await bus.call(read_msg)
+        raw_val = read_reply.body[0]
+        if isinstance(raw_val, (list, tuple)):
+            raw = bytes(raw_val)
+        elif isinstance(raw_val, (bytes, bytearray)):
+            raw = bytes(raw_val)
+        else:
+            raw = b''
+        return fmt_val(raw)
+
+    readable = [c[0] for c in chars if c[2]]
+    results = await asyncio.gather(*(_read(p) for p in readable), return_exceptions=True)
+    values = {p: ('' if isinstance(v, BaseException) else v) for p, v in zip(readable, results)}
+
+    rows = []
+    for path, uuid, r_flag, w_flag, n_flag, i_flag in chars:
+        rows.append((path.rsplit('/', 1)[-1], str(uuid), r_flag, w_flag, n_flag, i_flag, values.get(path, '')))
+
+    console = Console()
+    table = Table(show_header=True, header_style="bold cyan")
+    table.add_column("Handle", style="dim")
+    table.add_column("UUID")
+    table.add_column("R", justify="center")
+    table.add_column("W", justify="center")
+    table.add_column("N", justify="center")
+    table.add_column("I", justify="center")
+    table.add_column("Value", overflow="fold")
+
+    for r in rows:
+        table.add_row(*r)
+
+    console.print(table)
+    return 0
+
+
+def main():
     if len(sys.argv) < 2:
         print("Usage: gatt_enum.py <MAC>")
-        sys.exit(2)
+        return 2
     mac = sys.argv[1].upper()
-    sys.exit(asyncio.run(main_async(mac)))
+    return asyncio.run(main_async(mac))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,18 +5,23 @@ Patch an embedded device name string inside a PlatformIO firmware binary.
 Installed as a poetry script entrypoint `patch-device-name`.
 """
 import argparse
+import mmap
+import os
+import re
 import shutil
 from pathlib import Path
 import sys
 
 
 def find_all(data: bytes, needle: bytes):
-    offs = []
-    i = data.find(needle)
-    while i != -1:
-        offs.append(i)
-        i = data.find(needle, i + 1)
-    return offs
+    # Zero-width lookahead so overlapping matches are reported too
+    pat = re.compile(b'(?=' + re.escape(needle) + b')')
+    return [m.start() for m in pat.finditer(data)]
+
+
+# Known adv prefix, then the name field's length byte and type 0x09.
+# DOTALL so a length byte of 0x0a still matches `.`
+_ADV_RE = re.compile(rb'\x02\x01\x06\x02\x0a\xeb\x03\x03\xff\x00(.)\x09', re.DOTALL)
 
 
 def find_adv_name_field(data: bytes):
@@ -26,19 +31,12 @@ def find_adv_name_field(data: bytes):
     Looks for: 02 01 06 02 0a eb 03 03 FF 00 <len> 09 <name...>
     Returns None if not found.
     """
-    prefix = bytes([0x02, 0x01, 0x06, 0x02, 0x0a, 0xeb, 0x03, 0x03, 0xFF, 0x00])
-    i = data.find(prefix)
-    while i != -1:
-        pos = i + len(prefix)
-        # need at least length and type
-        if pos + 2 <= len(data):
-            L = data[pos]
-            t = data[pos + 1]
-            if t == 0x09 and L >= 1 and (pos + 2 + (L - 1)) <= len(data):
-                name_offset = pos + 2
-                name_len = L - 1
-                return name_offset, name_len
-        i = data.find(prefix, i + 1)
+    m = _ADV_RE.search(data)
+    while m is not None:
+        L = m.group(1)[0]
+        if L >= 1 and m.end() + (L - 1) <= len(data):
+            return m.end(), L - 1
+        m = _ADV_RE.search(data, m.start() + 1)
     return None
 
 
@@ -53,6 +51,8 @@ def main():
                    help="Existing ASCII needle to find and replace (default: BLECTF)")
     p.add_argument("--out", "-o", type=Path,
                    help="Output path for patched firmware (defaults to overwrite input)")
+    p.add_argument("--verbose", "-v", action="store_true",
+                   help="Also count every needle occurrence (scans the whole image)")
     args = p.parse_args()
 
     needle = args.needle.encode('ascii')
@@ -67,71 +67,75 @@ def main():
         print(f"Firmware not found: {firmware}")
         sys.exit(2)
 
-    data = firmware.read_bytes()
-
-    occ = find_all(data, needle)
-    patched = bytearray(data)
+    if firmware.stat().st_size == 0:
+        print(f"Firmware is empty: {firmware}")
+        sys.exit(3)
+
+    # Search a read-only mapping of the image instead of reading it into memory
+    with open(firmware, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # the first occurrence is patched, so stop scanning at it
+        offset = data.find(needle)
+
+        if offset != -1:
+            if len(newname) > len(needle):
+                print(f"New name too long ({len(newname)} > {len(needle)}). Max {len(needle)}")
+                sys.exit(4)
+            if args.verbose:
+                print(f"Found needle at offset 0x{offset:x} (first of {len(find_all(data, needle))})")
+            else:
+                print(f"Found needle at offset 0x{offset:x}")
+            # the whole needle is the field to overwrite
+            field_off, field_len = offset, len(needle)
+        else:
+            # fallback: try to locate the Complete Local Name field in raw adv buffer
+            adv = find_adv_name_field(data)
+            if not adv:
+                print(f"Needle {needle!r} not found and adv-name pattern not found in {firmware}")
+                sys.exit(3)
+            name_offset, name_max = adv
+            if len(newname) > name_max:
+                print(f"New name too long ({len(newname)} > {name_max}). Max {name_max}")
+                sys.exit(4)
+            print(f"Found adv name field at offset 0x{name_offset:x} (max {name_max} bytes)")
+            field_off, field_len = name_offset, name_max
 
-    if occ:
-        if len(newname) > len(needle):
-            print(f"New name too long ({len(newname)} > {len(needle)}). Max {len(needle)}")
-            sys.exit(4)
-        # choose first occurrence by default
-        offset = occ[0]
-        print(f"Found needle at offset 0x{offset:x} (first of {len(occ)})")
         # show current embedded name (trim NULs)
-        orig_slice = data[offset:offset+len(needle)]
-        try:
-            orig_name = orig_slice.split(b'\x00', 1)[0].decode('ascii', errors='replace')
-        except Exception:
-            orig_name = repr(orig_slice)
-        print(f"Current name: '{orig_name}'")
-        # prepare patched buffer
-        patched[offset:offset+len(newname)] = newname
-        if len(newname) < len(needle):
-            # NUL-pad the remainder
-            for i in range(offset+len(newname), offset+len(needle)):
-                patched[i] = 0x00
-    else:
-        # fallback: try to locate the Complete Local Name field in raw adv buffer
-        adv = find_adv_name_field(data)
-        if not adv:
-            print(f"Needle {needle!r} not found and adv-name pattern not found in {firmware}")
-            sys.exit(3)
-        name_offset, name_max = adv
-        if len(newname) > name_max:
-            print(f"New name too long ({len(newname)} > {name_max}). Max {name_max}")
-            sys.exit(4)
-        print(f"Found adv name field at offset 0x{name_offset:x} (max {name_max} bytes)")
-        orig_slice = data[name_offset:name_offset+name_max]
+        orig_slice = data[field_off:field_off+field_len]
         try:
             orig_name = orig_slice.split(b'\x00', 1)[0].decode('ascii', errors='replace')
         except Exception:
             orig_name = repr(orig_slice)
         print(f"Current name: '{orig_name}'")
-        # write new name and NUL-pad remainder of the field
-        patched[name_offset:name_offset+len(newname)] = newname
-        for i in range(name_offset+len(newname), name_offset+name_max):
-            patched[i] = 0x00
 
     outpath = args.out or firmware
 
-    # backup
+    # backup: a hard link costs no copy; the original inode is never
+    # written to below, so the link keeps the unpatched image
     bak = firmware.with_suffix(firmware.suffix + '.bak')
     if not bak.exists():
-        shutil.copy2(firmware, bak)
+        try:
+            os.link(firmware, bak)
+        except OSError:
+            shutil.copy2(firmware, bak)
         print(f"Backed up original to {bak}")
 
-    outpath.write_bytes(bytes(patched))
+    # Patch a temporary copy through a writable mapping, then atomically
+    # move it over the output so an interrupted run never leaves a torn image
+    tmp = outpath.with_suffix(outpath.suffix + '.tmp')
+    try:
+        shutil.copy2(firmware, tmp)
+        with open(tmp, 'r+b') as f, mmap.mmap(f.fileno(), 0) as patched:
+            # write new name and NUL-pad remainder of the field
+            patched[field_off:field_off+len(newname)] = newname
+            patched[field_off+len(newname):field_off+field_len] = b'\x00' * (field_len - len(newname))
+            patched.flush()
+            new_slice = patched[field_off:field_off+field_len]
+        os.replace(tmp, outpath)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
     print(f"Wrote patched firmware to {outpath}")
-    # show resulting embedded name; determine slice bounds depending on which branch ran
-    if occ:
-        result_off = offset
-        result_len = len(needle)
-    else:
-        result_off = name_offset
-        result_len = name_max
-    new_slice = patched[result_off:result_off+result_len]
+    # show resulting embedded name
     try:
         new_name = new_slice.split(b'\x00', 1)[0].decode('ascii', errors='replace')
     except Exception: